@@ -18,8 +18,8 @@ class SalesInsightsGenerator:
         """Generate insights about sales trends"""
         insights = []
         
-        # Monthly trend analysis
-        monthly_sales = df.groupby(['YEAR', 'MONTH'])['SALES'].sum().reset_index()
+        # Monthly trend analysis (kept sorted: growth and yearly totals rely on date order)
+        monthly_sales = df.groupby(['YEAR', 'MONTH'], observed=True)['SALES'].sum().reset_index()
         monthly_sales['date'] = pd.to_datetime(monthly_sales[['YEAR', 'MONTH']].assign(DAY=1))
         
         # Calculate month-over-month growth
@@ -45,8 +45,8 @@ class SalesInsightsGenerator:
             'impact': 'medium'
         })
         
-        # Year-over-year analysis
-        yearly_sales = df.groupby('YEAR')['SALES'].sum()
+        # Year-over-year analysis, rolled up from the monthly totals instead of the full frame
+        yearly_sales = monthly_sales.groupby('YEAR')['SALES'].sum()
         if len(yearly_sales) > 1:
             yoy_growth = ((yearly_sales.iloc[-1] - yearly_sales.iloc[-2]) / yearly_sales.iloc[-2]) * 100
             
@@ -73,7 +73,7 @@ class SalesInsightsGenerator:
         """Generate insights about product performance"""
         insights = []
         
-        product_sales = df.groupby('PRODUCTLINE')['SALES'].sum().sort_values(ascending=False)
+        product_sales = df.groupby('PRODUCTLINE', observed=True)['SALES'].sum().sort_values(ascending=False)
         total_sales = product_sales.sum()
         
         # Top performer
@@ -103,18 +103,31 @@ class SalesInsightsGenerator:
         
         return insights
     
-    def generate_customer_insights(self, df):
-        """Generate insights about customer behavior"""
+    def generate_customer_insights(self, df, customer_agg=None):
+        """
+        Generate insights about customer behavior
+        
+        Args:
+            df (pd.DataFrame): Sales data
+            customer_agg (pd.DataFrame, optional): Precomputed per-customer totals with
+                customer, total_sales, order_count and total_quantity columns
+        """
         insights = []
         
-        customer_analysis = df.groupby('CUSTOMERNAME').agg({
-            'SALES': 'sum',
-            'ORDERNUMBER': 'count',
-            'QUANTITYORDERED': 'sum'
-        }).reset_index()
-        
-        customer_analysis.columns = ['customer', 'total_sales', 'order_count', 'total_quantity']
-        customer_analysis['avg_order_value'] = customer_analysis['total_sales'] / customer_analysis['order_count']
+        if customer_agg is None:
+            customer_agg = df.groupby('CUSTOMERNAME', sort=False, observed=True).agg(
+                total_sales=('SALES', 'sum'),
+                order_count=('ORDERNUMBER', 'count'),
+                total_quantity=('QUANTITYORDERED', 'sum')
+            ).reset_index().rename(columns={'CUSTOMERNAME': 'customer'})
+        
+        # Average order value is derived on a copy so a shared aggregate is left untouched;
+        # a plain array division skips index alignment and yields 0 for zero-order rows
+        total_sales = customer_agg['total_sales'].to_numpy(dtype=np.float64)
+        order_count = customer_agg['order_count'].to_numpy()
+        customer_analysis = customer_agg.assign(
+            avg_order_value=np.divide(total_sales, order_count, out=np.zeros_like(total_sales), where=order_count > 0)
+        )
         
         # Top customer
         top_customer = customer_analysis.loc[customer_analysis['total_sales'].idxmax()]
@@ -142,14 +155,14 @@ class SalesInsightsGenerator:
         
         return insights
     
-    def generate_all_insights(self, df):
+    def generate_all_insights(self, df, customer_agg=None):
         """Generate comprehensive insights from sales data"""
         all_insights = []
         
         # Generate insights from different perspectives
         all_insights.extend(self.generate_trend_insights(df))
         all_insights.extend(self.generate_product_insights(df))
-        all_insights.extend(self.generate_customer_insights(df))
+        all_insights.extend(self.generate_customer_insights(df, customer_agg))
         
         # Sort by impact level
         impact_order = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
@@ -193,18 +206,19 @@ class SalesInsightsGenerator:
         
         return report
 
-def generate_sales_insights(df):
+def generate_sales_insights(df, customer_agg=None):
     """
     Convenience function to generate comprehensive sales insights
     
     Args:
         df (pd.DataFrame): Sales data
+        customer_agg (pd.DataFrame, optional): Precomputed per-customer totals
         
     Returns:
         tuple: (insights_list, formatted_report)
     """
     generator = SalesInsightsGenerator()
-    insights = generator.generate_all_insights(df)
+    insights = generator.generate_all_insights(df, customer_agg)
     report = generator.format_insights_report(insights)
     
     return insights, report
@@ -1,12 +1,35 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from pydantic import BaseModel, ConfigDict, ValidationError
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from functools import lru_cache
+import logging
 import os
 from typing import Optional, List, Dict, Any
 import json
 
+# pyarrow's multithreaded CSV parser is much faster than the default C engine;
+# fall back to the C engine rather than to sample data when it is not installed
+try:
+    import pyarrow
+    import pyarrow.ipc
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    pyarrow = None
+    CSV_ENGINE = "c"
+
+# Media type clients send in Accept to receive large payloads as an Arrow IPC stream
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+# Seconds clients and proxies may reuse a /kpis response before asking again
+KPIS_MAX_AGE = 60
+
+logger = logging.getLogger(__name__)
+
 app = FastAPI(title="Sales Data Dashboard API", version="1.0.0")
 
 # Add CORS middleware
@@ -18,21 +41,152 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global variable to store the loaded data
+# Compress JSON and Arrow responses for clients that accept gzip; tiny payloads
+# such as /kpis stay uncompressed since the framing would outweigh the savings
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
+# Copy-on-Write: filtered frames and selections share memory with df until written to,
+# so handlers can slice the global data without defensive copies
+pd.set_option('mode.copy_on_write', True)
+
+# Global variables to store the loaded data and aggregates derived from it
 df = None
+customer_agg = None
+aggregates = {}
+year_ranges = {}
+
+# Low-cardinality string columns stored as pandas categories
+CATEGORY_COLUMNS = ['PRODUCTLINE', 'COUNTRY', 'STATUS', 'CUSTOMERNAME']
+
+def aggregate_customers(data):
+    """Aggregate sales, order count and quantity per customer, highest sales first"""
+    customers = data.groupby('CUSTOMERNAME', sort=False, observed=True).agg(
+        total_sales=('SALES', 'sum'),
+        order_count=('ORDERNUMBER', 'count'),
+        total_quantity=('QUANTITYORDERED', 'sum')
+    ).reset_index()
+    customers = customers.rename(columns={'CUSTOMERNAME': 'customer'})
+    return customers.sort_values('total_sales', ascending=False, ignore_index=True)
+
+def compute_kpis(data):
+    """Compute key performance indicators"""
+    total_sales = data['SALES'].sum()
+    total_orders = data['ORDERNUMBER'].nunique()
+    total_quantity = data['QUANTITYORDERED'].sum()
+    avg_order_value = data['SALES'].mean()
+    
+    # Year over year growth from one pass over YEAR instead of a mask per year
+    yearly_sales = data.groupby('YEAR')['SALES'].sum()
+    current_year = yearly_sales.index[-1]
+    previous_year = current_year - 1
+    
+    current_year_sales = yearly_sales.iloc[-1]
+    previous_year_sales = yearly_sales.get(previous_year, 0)
+    
+    yoy_growth = ((current_year_sales - previous_year_sales) / previous_year_sales * 100) if previous_year_sales > 0 else 0
+    
+    return {
+        "total_sales": round(float(total_sales), 2),
+        "total_orders": int(total_orders),
+        "total_quantity": int(total_quantity),
+        "avg_order_value": round(float(avg_order_value), 2),
+        "yoy_growth": round(float(yoy_growth), 2),
+        "current_year": int(current_year),
+        "previous_year": int(previous_year)
+    }
+
+def series_to_records(series, key_name, value_name):
+    """Turn an aggregated Series into records without building an intermediate DataFrame"""
+    return [{key_name: key, value_name: value} for key, value in zip(series.index.tolist(), series.tolist())]
+
+def compute_sales_by_category(data):
+    """Compute sales records per product line, highest first"""
+    category_sales = data.groupby('PRODUCTLINE', sort=False, observed=True)['SALES'].sum()
+    return series_to_records(category_sales.sort_values(ascending=False), 'PRODUCTLINE', 'SALES')
+
+def compute_sales_by_country(data):
+    """Compute sales records for every country, highest first"""
+    country_sales = data.groupby('COUNTRY', sort=False, observed=True)['SALES'].sum()
+    return series_to_records(country_sales.sort_values(ascending=False), 'COUNTRY', 'SALES')
+
+def compute_order_status(data):
+    """Compute order count records per status"""
+    return series_to_records(data['STATUS'].value_counts(), 'status', 'count')
+
+def compute_data_summary(data):
+    """Compute the overall data summary"""
+    return {
+        "total_records": int(len(data)),
+        "date_range": {
+            "start": data['ORDERDATE'].min().strftime('%Y-%m-%d'),
+            "end": data['ORDERDATE'].max().strftime('%Y-%m-%d')
+        },
+        "unique_customers": int(data['CUSTOMERNAME'].nunique()),
+        "unique_countries": int(data['COUNTRY'].nunique()),
+        "unique_products": int(data['PRODUCTLINE'].nunique()),
+        "columns": list(data.columns)
+    }
+
+@lru_cache(maxsize=64)
+def sales_over_time_records(period, year):
+    """Compute sales records over time, cached per (period, year) until the data is reloaded"""
+    if year:
+        start, end = year_ranges.get(year, (0, 0))
+        data = df.iloc[start:end]
+    else:
+        data = df
+    
+    if period == "day":
+        grouped = data.groupby('ORDERDATE')['SALES'].sum().reset_index()
+        grouped['date'] = grouped['ORDERDATE'].dt.strftime('%Y-%m-%d')
+    elif period == "month":
+        grouped = data.groupby(['YEAR', 'MONTH'])['SALES'].sum().reset_index()
+        grouped['date'] = grouped['YEAR'].astype(str) + '-' + grouped['MONTH'].astype(str).str.zfill(2)
+    else:
+        grouped = data.groupby('YEAR')['SALES'].sum().reset_index()
+        grouped['date'] = grouped['YEAR'].astype(str)
+    
+    return tuple(grouped[['date', 'SALES']].to_dict('records'))
 
 def load_data():
     """Load the cleaned sales data"""
-    global df
+    global df, customer_agg, aggregates, year_ranges
     try:
         data_path = os.path.join(os.path.dirname(__file__), "..", "data", "processed", "sales_cleaned.csv")
-        df = pd.read_csv(data_path)
-        df['ORDERDATE'] = pd.to_datetime(df['ORDERDATE'])
+        df = pd.read_csv(data_path, engine=CSV_ENGINE, parse_dates=['ORDERDATE'])
+        # Downcast integer columns only when they hold no missing values
+        for col in ['ORDERNUMBER', 'QUANTITYORDERED']:
+            df[col] = pd.to_numeric(df[col], downcast='integer')
         print(f"Data loaded successfully: {df.shape}")
     except Exception as e:
         print(f"Error loading data: {e}")
         # Create sample data if file doesn't exist
         create_sample_data()
+    
+    # Group and count on category codes rather than hashing Python strings
+    for col in CATEGORY_COLUMNS:
+        df[col] = df[col].astype('category')
+    
+    # Sort by date so each year is one contiguous block of rows, and remember
+    # where every block starts and ends for slicing instead of masking. The sort
+    # also rebuilds every column as its own contiguous array, so column
+    # reductions need no further copy to get a column-major layout
+    df = df.sort_values('ORDERDATE', kind='stable', ignore_index=True)
+    year_ranges = {
+        int(year): (int(positions[0]), int(positions[-1]) + 1)
+        for year, positions in df.groupby('YEAR').indices.items()
+    }
+    
+    # The data never changes after loading, so aggregate it once here
+    sales_over_time_records.cache_clear()
+    customer_agg = aggregate_customers(df)
+    aggregates = {
+        'kpis': {**compute_kpis(df), '_cache': {'max_age': KPIS_MAX_AGE}},
+        'sales_by_category': compute_sales_by_category(df),
+        'sales_by_country': compute_sales_by_country(df),
+        'order_status': compute_order_status(df),
+        'data_summary': compute_data_summary(df)
+    }
 
 def create_sample_data():
     """Create sample data for testing"""
@@ -45,15 +199,19 @@ def create_sample_data():
     product_lines = ['Classic Cars', 'Motorcycles', 'Planes', 'Ships', 'Trains', 'Trucks and Buses', 'Vintage Cars']
     statuses = ['Shipped', 'In Process', 'Cancelled', 'On Hold', 'Disputed', 'Resolved']
     
+    # Sample integer positions and index into the lookups, building categoricals
+    # straight from the codes instead of materialising arrays of strings
     data = {
         'ORDERNUMBER': range(10100, 10100 + n_records),
         'SALES': np.random.uniform(1000, 50000, n_records),
-        'ORDERDATE': np.random.choice(dates, n_records),
-        'PRODUCTLINE': np.random.choice(product_lines, n_records),
-        'COUNTRY': np.random.choice(countries, n_records),
+        'ORDERDATE': dates.values[np.random.randint(0, len(dates), n_records)],
+        'PRODUCTLINE': pd.Categorical.from_codes(np.random.randint(0, len(product_lines), n_records), product_lines),
+        'COUNTRY': pd.Categorical.from_codes(np.random.randint(0, len(countries), n_records), countries),
         'QUANTITYORDERED': np.random.randint(1, 50, n_records),
         'CUSTOMERNAME': [f'Customer_{i}' for i in range(n_records)],
-        'STATUS': np.random.choice(statuses, n_records, p=[0.6, 0.15, 0.05, 0.05, 0.05, 0.1])
+        'STATUS': pd.Categorical.from_codes(
+            np.random.choice(len(statuses), n_records, p=[0.6, 0.15, 0.05, 0.05, 0.05, 0.1]), statuses
+        )
     }
     
     df = pd.DataFrame(data)
@@ -75,49 +233,69 @@ def root():
         "/sales_by_country",
         "/top_customers",
         "/kpis",
-        "/order_status"
+        "/order_status",
+        "/dashboard_bundle"
     ]}
 
-@app.get("/sales_over_time")
-def sales_over_time(period: str = "month", year: Optional[int] = None):
-    """Get sales data over time by day/month/year"""
+def wants_arrow(accept):
+    """Whether the client asked for an Arrow IPC stream and pyarrow can produce one"""
+    return pyarrow is not None and accept is not None and ARROW_STREAM in accept
+
+def arrow_response(table):
+    """Serialize an Arrow table as an IPC stream response"""
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(content=sink.getvalue().to_pybytes(), media_type=ARROW_STREAM)
+
+# Payload functions: the JSON bodies of the GET routes, also called by /dashboard_bundle.
+# Request-only inputs such as the Accept header stay on the routes themselves.
+
+def sales_over_time_payload(period: str = "month", year: Optional[int] = None):
+    """Sales over time by day/month/year"""
     if df is None:
         raise HTTPException(status_code=500, detail="Data not loaded")
     
-    data = df.copy()
-    
-    if year:
-        data = data[data['YEAR'] == year]
-    
-    if period == "day":
-        grouped = data.groupby('ORDERDATE')['SALES'].sum().reset_index()
-        grouped['date'] = grouped['ORDERDATE'].dt.strftime('%Y-%m-%d')
-    elif period == "month":
-        grouped = data.groupby(['YEAR', 'MONTH'])['SALES'].sum().reset_index()
-        grouped['date'] = grouped['YEAR'].astype(str) + '-' + grouped['MONTH'].astype(str).str.zfill(2)
-    elif period == "year":
-        grouped = data.groupby('YEAR')['SALES'].sum().reset_index()
-        grouped['date'] = grouped['YEAR'].astype(str)
-    else:
+    if period not in ("day", "month", "year"):
         raise HTTPException(status_code=400, detail="Period must be 'day', 'month', or 'year'")
     
     return {
         "period": period,
         "year": year,
-        "data": grouped[['date', 'SALES']].to_dict('records')
+        "data": list(sales_over_time_records(period, year))
+    }
+
+def top_customers_payload(limit: int = 10):
+    """Top customers by sales"""
+    if df is None:
+        raise HTTPException(status_code=500, detail="Data not loaded")
+    
+    return {
+        "limit": limit,
+        "data": customer_agg.head(limit).to_dict('records')
     }
 
+@app.get("/sales_over_time")
+def sales_over_time(period: str = "month", year: Optional[int] = None, accept: Optional[str] = Header(None)):
+    """Get sales data over time by day/month/year"""
+    payload = sales_over_time_payload(period, year)
+    if wants_arrow(accept):
+        records = payload["data"]
+        return arrow_response(pyarrow.table({
+            "date": pyarrow.array([r["date"] for r in records], type=pyarrow.string()),
+            "SALES": pyarrow.array([r["SALES"] for r in records], type=pyarrow.float64())
+        }))
+    
+    return payload
+
 @app.get("/sales_by_category")
 def sales_by_category():
     """Get sales data by product line"""
     if df is None:
         raise HTTPException(status_code=500, detail="Data not loaded")
     
-    category_sales = df.groupby('PRODUCTLINE')['SALES'].sum().reset_index()
-    category_sales = category_sales.sort_values('SALES', ascending=False)
-    
     return {
-        "data": category_sales.to_dict('records')
+        "data": aggregates['sales_by_category']
     }
 
 @app.get("/sales_by_country")
@@ -126,63 +304,37 @@ def sales_by_country(limit: int = 10):
     if df is None:
         raise HTTPException(status_code=500, detail="Data not loaded")
     
-    country_sales = df.groupby('COUNTRY')['SALES'].sum().reset_index()
-    country_sales = country_sales.sort_values('SALES', ascending=False).head(limit)
-    
     return {
         "limit": limit,
-        "data": country_sales.to_dict('records')
+        "data": aggregates['sales_by_country'][:limit]
     }
 
 @app.get("/top_customers")
-def top_customers(limit: int = 10):
+def top_customers(limit: int = 10, accept: Optional[str] = Header(None)):
     """Get top customers by sales"""
+    if not wants_arrow(accept):
+        return top_customers_payload(limit)
+    
     if df is None:
         raise HTTPException(status_code=500, detail="Data not loaded")
     
-    customer_sales = df.groupby('CUSTOMERNAME').agg({
-        'SALES': 'sum',
-        'ORDERNUMBER': 'count',
-        'QUANTITYORDERED': 'sum'
-    }).reset_index()
-    
-    customer_sales.columns = ['customer', 'total_sales', 'order_count', 'total_quantity']
-    customer_sales = customer_sales.sort_values('total_sales', ascending=False).head(limit)
-    
-    return {
-        "limit": limit,
-        "data": customer_sales.to_dict('records')
-    }
+    # Plain strings: a categorical column would ship every customer in its dictionary
+    customer_sales = customer_agg.head(limit).astype({'customer': str})
+    return arrow_response(pyarrow.Table.from_pandas(customer_sales, preserve_index=False))
 
-@app.get("/kpis")
-def get_kpis():
-    """Get key performance indicators"""
+def kpis_payload():
+    """Key performance indicators"""
     if df is None:
         raise HTTPException(status_code=500, detail="Data not loaded")
     
-    total_sales = df['SALES'].sum()
-    total_orders = df['ORDERNUMBER'].nunique()
-    total_quantity = df['QUANTITYORDERED'].sum()
-    avg_order_value = df['SALES'].mean()
-    
-    # Year over year growth
-    current_year = df['YEAR'].max()
-    previous_year = current_year - 1
-    
-    current_year_sales = df[df['YEAR'] == current_year]['SALES'].sum()
-    previous_year_sales = df[df['YEAR'] == previous_year]['SALES'].sum()
-    
-    yoy_growth = ((current_year_sales - previous_year_sales) / previous_year_sales * 100) if previous_year_sales > 0 else 0
-    
-    return {
-        "total_sales": round(float(total_sales), 2),
-        "total_orders": int(total_orders),
-        "total_quantity": int(total_quantity),
-        "avg_order_value": round(float(avg_order_value), 2),
-        "yoy_growth": round(float(yoy_growth), 2),
-        "current_year": int(current_year),
-        "previous_year": int(previous_year)
-    }
+    return aggregates['kpis']
+
+@app.get("/kpis")
+def get_kpis(response: Response):
+    """Get key performance indicators"""
+    payload = kpis_payload()
+    response.headers["Cache-Control"] = f"max-age={KPIS_MAX_AGE}"
+    return payload
 
 @app.get("/order_status")
 def order_status():
@@ -190,11 +342,8 @@ def order_status():
     if df is None:
         raise HTTPException(status_code=500, detail="Data not loaded")
     
-    status_counts = df['STATUS'].value_counts().reset_index()
-    status_counts.columns = ['status', 'count']
-    
     return {
-        "data": status_counts.to_dict('records')
+        "data": aggregates['order_status']
     }
 
 @app.get("/data_summary")
@@ -203,17 +352,68 @@ def data_summary():
     if df is None:
         raise HTTPException(status_code=500, detail="Data not loaded")
     
-    return {
-        "total_records": int(len(df)),
-        "date_range": {
-            "start": df['ORDERDATE'].min().strftime('%Y-%m-%d'),
-            "end": df['ORDERDATE'].max().strftime('%Y-%m-%d')
-        },
-        "unique_customers": int(df['CUSTOMERNAME'].nunique()),
-        "unique_countries": int(df['COUNTRY'].nunique()),
-        "unique_products": int(df['PRODUCTLINE'].nunique()),
-        "columns": list(df.columns)
-    }
+    return aggregates['data_summary']
+
+class BundleRequestItem(BaseModel):
+    endpoint: str
+    params: Dict[str, Any] = {}
+
+class DashboardBundleRequest(BaseModel):
+    requests: List[BundleRequestItem]
+
+# Query params each bundled endpoint accepts, coerced like the GET routes coerce them;
+# anything else is rejected
+class BundleParams(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
+class SalesOverTimeParams(BundleParams):
+    period: str = "month"
+    year: Optional[int] = None
+
+class LimitParams(BundleParams):
+    limit: int = 10
+
+# GET endpoints that can be requested through /dashboard_bundle: (payload function, params model)
+BUNDLE_HANDLERS = {
+    "/sales_over_time": (sales_over_time_payload, SalesOverTimeParams),
+    "/sales_by_category": (sales_by_category, BundleParams),
+    "/sales_by_country": (sales_by_country, LimitParams),
+    "/top_customers": (top_customers_payload, LimitParams),
+    "/kpis": (kpis_payload, BundleParams),
+    "/order_status": (order_status, BundleParams),
+    "/data_summary": (data_summary, BundleParams)
+}
+
+@app.post("/dashboard_bundle")
+def dashboard_bundle(bundle: DashboardBundleRequest):
+    """Serve several GET endpoints in one round trip, answering each request in order"""
+    responses = []
+    for item in bundle.requests:
+        if item.endpoint not in BUNDLE_HANDLERS:
+            responses.append({"endpoint": item.endpoint, "status_code": 404, "detail": "Unknown endpoint"})
+            continue
+        handler, params_model = BUNDLE_HANDLERS[item.endpoint]
+        
+        try:
+            params = params_model.model_validate(item.params)
+        except ValidationError as e:
+            errors = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+            responses.append({"endpoint": item.endpoint, "status_code": 400, "detail": f"Invalid params: {errors}"})
+            continue
+        
+        # Any failure is reported on its own item so the rest of the bundle is still served
+        try:
+            data = handler(**params.model_dump())
+        except HTTPException as e:
+            responses.append({"endpoint": item.endpoint, "status_code": e.status_code, "detail": e.detail})
+        except Exception:
+            # Keep exception details in the server log rather than in the response
+            logger.exception("Bundled request to %s failed", item.endpoint)
+            responses.append({"endpoint": item.endpoint, "status_code": 500, "detail": "Internal error"})
+        else:
+            responses.append({"endpoint": item.endpoint, "status_code": 200, "data": data})
+    
+    return {"responses": responses}
 
 if __name__ == "__main__":
     import uvicorn
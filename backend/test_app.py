@@ -0,0 +1,56 @@
+from fastapi.testclient import TestClient
+
+from app import app, BUNDLE_HANDLERS
+
+
+def test_bundle_matches_get_for_every_handler():
+    """Each bundled endpoint answers 200 with the same body as its GET route"""
+    with TestClient(app) as client:
+        endpoints = list(BUNDLE_HANDLERS)
+        response = client.post(
+            "/dashboard_bundle",
+            json={"requests": [{"endpoint": endpoint, "params": {}} for endpoint in endpoints]}
+        )
+        assert response.status_code == 200
+
+        items = response.json()["responses"]
+        assert [item["endpoint"] for item in items] == endpoints
+        for item in items:
+            assert item["status_code"] == 200, item
+            assert item["data"] == client.get(item["endpoint"]).json()
+
+
+def test_bundle_coerces_params_and_isolates_bad_items():
+    """Params are coerced or rejected per item; a bad item never fails the whole bundle"""
+    with TestClient(app) as client:
+        response = client.post("/dashboard_bundle", json={"requests": [
+            {"endpoint": "/sales_by_country", "params": {"limit": "5"}},
+            {"endpoint": "/sales_by_country", "params": {"limit": "five"}},
+            {"endpoint": "/kpis", "params": {"response": 1}},
+            {"endpoint": "/sales_over_time", "params": {"period": "week"}},
+            {"endpoint": "/unknown", "params": {}},
+            {"endpoint": "/order_status", "params": {}}
+        ]})
+        assert response.status_code == 200
+
+        items = response.json()["responses"]
+        assert [item["status_code"] for item in items] == [200, 400, 400, 400, 404, 200]
+        assert items[0]["data"] == client.get("/sales_by_country", params={"limit": 5}).json()
+
+
+def test_bundle_hides_handler_exception_details(monkeypatch):
+    """An unexpected handler error is reported as a generic 500 on its own item"""
+    def broken():
+        raise RuntimeError("secret detail")
+
+    monkeypatch.setitem(BUNDLE_HANDLERS, "/kpis", (broken, BUNDLE_HANDLERS["/kpis"][1]))
+    with TestClient(app) as client:
+        response = client.post("/dashboard_bundle", json={"requests": [
+            {"endpoint": "/kpis", "params": {}},
+            {"endpoint": "/order_status", "params": {}}
+        ]})
+        assert response.status_code == 200
+
+        items = response.json()["responses"]
+        assert items[0] == {"endpoint": "/kpis", "status_code": 500, "detail": "Internal error"}
+        assert items[1]["status_code"] == 200
@@ -1,12 +1,14 @@
 import streamlit as st
 import requests
 import pandas as pd
+import pyarrow.ipc
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
-from datetime import datetime, timedelta
 import time
+from datetime import datetime, timedelta
+from functools import lru_cache
 
 # Page configuration
 st.set_page_config(
@@ -44,56 +46,282 @@ st.markdown("""
 # API Configuration
 API_BASE_URL = "http://localhost:8000"
 
-def fetch_data(endpoint, params=None):
-    """Fetch data from the API"""
+# Large tabular endpoints are requested as Arrow IPC streams instead of JSON
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+# Roughly the chart's width in pixels; longer trend series are downsampled to this,
+# which also keeps the line few enough points for SVG
+MAX_TREND_POINTS = 1000
+
+# Plotly toolbar is hidden; the charts are read-only views of the tables beside them
+PLOTLY_CONFIG = {"displayModeBar": False}
+
+# Column format applied by the table Stylers, matching format_currency
+CURRENCY_FORMAT = "${:,.2f}"
+
+# Sidebar filter options and tab labels, built once instead of on every rerun
+PERIOD_OPTIONS = ("month", "day", "year")
+YEAR_OPTIONS = ("All", 2020, 2021, 2022, 2023, 2024)
+TAB_LABELS = ("📈 Overview", "🏷️ Products", "🌍 Geography", "👥 Customers", "📊 Analytics")
+
+# Interval of the optional dashboard auto-refresh
+AUTO_REFRESH_SECONDS = 30
+
+# Matches the backend's Cache-Control max-age for /kpis
+KPIS_CACHE_SECONDS = 60
+
+# Freshness window of the API responses persisted to disk
+DISK_CACHE_SECONDS = 3600
+
+@st.cache_resource
+def get_session():
+    """Shared HTTP session so API calls reuse keep-alive connections"""
+    # Requests are made one at a time per script run, so the default pool (10 kept-alive
+    # connections per host) covers the browser sessions sharing this object.
+    # requests already sends Accept-Encoding for gzip (and br when brotli is installed)
+    # and decompresses transparently, so the backend's gzip responses need no extra handling
+    return requests.Session()
+
+def get_json(endpoint, params_items):
+    """Fetch JSON from the API"""
+    response = get_session().get(f"{API_BASE_URL}{endpoint}", params=dict(params_items), timeout=5)
+    response.raise_for_status()
+    return response.json()
+
+def get_arrow(endpoint, params_items):
+    """Fetch a table from the API as an Arrow IPC stream, falling back to the JSON "data" records"""
+    response = get_session().get(
+        f"{API_BASE_URL}{endpoint}", params=dict(params_items), headers={"Accept": ARROW_STREAM}, timeout=5
+    )
+    response.raise_for_status()
+    # The backend answers with JSON when it has no pyarrow to write the stream with
+    if response.headers.get("Content-Type", "").startswith(ARROW_STREAM):
+        return pyarrow.ipc.open_stream(response.content).read_all().to_pandas()
+    return pd.DataFrame(response.json()["data"])
+
+def params_key(params):
+    """Turn a params dict into a sorted tuple of items so it can be part of the cache key"""
+    return tuple(sorted((params or {}).items()))
+
+def check_api():
+    """Ping the API root, uncached so a backend that is down is never reported as connected"""
     try:
-        response = requests.get(f"{API_BASE_URL}{endpoint}", params=params)
-        response.raise_for_status()
-        return response.json()
+        return get_json("/", ())
     except requests.exceptions.RequestException as e:
         st.error(f"Error fetching data from API: {e}")
         return None
 
+# Arrow tables are persisted to disk so a restarted app starts warm. Streamlit ignores
+# ttl on persisted caches, so each entry carries its fetch time and fetch_table clears and
+# refetches it once it is too old; every endpoint and params pair keeps a single file.
+
+@st.cache_data(persist="disk", show_spinner=False, max_entries=128)
+def fetch_arrow(endpoint, params_items):
+    """get_arrow cached per endpoint and params, with the time it was fetched; failures are not cached"""
+    return time.time(), get_arrow(endpoint, params_items)
+
+def fetch_table(endpoint, params=None):
+    """Fetch tabular data from the API as a DataFrame"""
+    # With auto-refresh on, each refresh fetches anything older than one refresh interval
+    max_age = AUTO_REFRESH_SECONDS if st.session_state.get("auto_refresh") else DISK_CACHE_SECONDS
+    params_items = params_key(params)
+    try:
+        fetched_at, table = fetch_arrow(endpoint, params_items)
+        if time.time() - fetched_at > max_age:
+            fetch_arrow.clear(endpoint, params_items)
+            fetched_at, table = fetch_arrow(endpoint, params_items)
+        return table
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error fetching data from API: {e}")
+        return None
+
+# The bundle carries /kpis, so it is cached no longer than the KPIs may be reused,
+# and only in memory: a 60 second entry would rarely still be fresh after a restart.
+# Auto-refresh keeps this cache, so bundled panels can lag by up to one refresh interval.
+@st.cache_data(ttl=KPIS_CACHE_SECONDS, show_spinner=False, max_entries=128)
+def post_bundle(items):
+    """POST a batch of (endpoint, params_items) requests to /dashboard_bundle, cached per batch"""
+    payload = {"requests": [{"endpoint": endpoint, "params": dict(params_items)} for endpoint, params_items in items]}
+    response = get_session().post(f"{API_BASE_URL}/dashboard_bundle", json=payload, timeout=5)
+    response.raise_for_status()
+    return response.json()["responses"]
+
+def fetch_bundle(endpoints):
+    """Fetch several endpoints in one round trip, keyed like the given {key: (endpoint, params)} dict"""
+    try:
+        responses = post_bundle(tuple((endpoint, params_key(params)) for endpoint, params in endpoints.values()))
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error fetching data from API: {e}")
+        return dict.fromkeys(endpoints)
+    
+    results = {}
+    for key, response in zip(endpoints, responses):
+        if response["status_code"] == 200:
+            results[key] = response["data"]
+        else:
+            st.error(f"Error fetching {response['endpoint']} from API: {response['detail']}")
+            results[key] = None
+    return results
+
+def lttb_indices(x, y, n_out):
+    """
+    Pick n_out points that preserve the shape of a series (Largest-Triangle-Three-Buckets)
+    
+    The first and last points are always kept; every bucket in between keeps the
+    point forming the largest triangle with the previously kept point and the
+    average of the next bucket.
+    """
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    
+    return indices
+
+# Metric values repeat across reruns, so formatted strings are memoized
+@lru_cache(maxsize=256)
 def format_currency(value):
     """Format value as currency"""
     return f"${value:,.2f}"
 
+@lru_cache(maxsize=256)
 def format_number(value):
     """Format value as number with commas"""
     return f"{value:,}"
 
-# Main header
-st.markdown('<h1 class="main-header">📊 Sales Data Dashboard</h1>', unsafe_allow_html=True)
+@st.cache_data(show_spinner=False)
+def compute_perf(total_orders, total_sales, total_quantity, unique_customers):
+    """Compute orders per customer, sales per customer and quantity per order"""
+    return (
+        total_orders / unique_customers,
+        total_sales / unique_customers,
+        total_quantity / total_orders
+    )
 
-# Sidebar for filters
-st.sidebar.header("🔧 Filters & Controls")
+# Chart builders: cached on the API records or frames, so a rerun with unchanged data
+# gets the finished figure back instead of rebuilding it. cache_resource hands every
+# session the same figure without copying it, so figures must not be mutated after building.
+# Arguments are hashed into the key, so new data builds (and caches) a new figure.
 
-# Check API connection
-with st.spinner("Checking API connection..."):
-    api_status = fetch_data("/")
-    if api_status:
-        st.sidebar.success("✅ API Connected")
-    else:
-        st.sidebar.error("❌ API Connection Failed")
-        st.error("Please make sure the backend API is running on http://localhost:8000")
-        st.stop()
+@st.cache_resource(show_spinner=False, max_entries=32)
+def build_trend_fig(df_time, period):
+    """Build the sales trend line chart"""
+    # The traces take the column arrays as they are; no renamed copy of the frame
+    dates = df_time["date"].to_numpy()
+    sales = df_time["SALES"].to_numpy(dtype=np.float64)
+    
+    # More points than pixels only adds transfer and render cost, so downsample
+    if len(dates) > MAX_TREND_POINTS:
+        x = dates.astype("datetime64[s]").astype(np.float64)
+        keep = lttb_indices(x, sales, MAX_TREND_POINTS)
+        dates, sales = dates[keep], sales[keep]
+    
+    fig = go.Figure(go.Scatter(x=dates, y=sales, mode="lines+markers"))
+    fig.update_layout(
+        title=f"Sales Trend by {period.title()}",
+        xaxis_title="Date",
+        yaxis_title="Sales ($)",
+        hovermode='x unified',
+        # Keep the user's zoom across reruns until the period changes
+        uirevision=period
+    )
+    return fig
 
-# Sidebar filters
-st.sidebar.subheader("📅 Time Filters")
-period = st.sidebar.selectbox("Time Period", ["month", "day", "year"], index=0)
-year_filter = st.sidebar.selectbox("Year Filter", ["All"] + list(range(2020, 2025)), index=0)
+@st.cache_resource(show_spinner=False, max_entries=32)
+def build_status_pie(records):
+    """Build the order status pie chart"""
+    # Records arrive sorted by count, so Plotly's own slice sort is skipped, and a
+    # constant uirevision lets Plotly keep the layout across reruns
+    fig = go.Figure(go.Pie(
+        labels=[record["status"] for record in records],
+        values=[record["count"] for record in records],
+        sort=False,
+        direction="clockwise",
+        marker=dict(colors=px.colors.qualitative.Set3)
+    ))
+    fig.update_layout(title="Order Status Distribution", uirevision="order_status")
+    return fig
 
-# Convert year filter
-selected_year = None if year_filter == "All" else year_filter
+@st.cache_resource(show_spinner=False, max_entries=32)
+def build_category_fig(records):
+    """Build the sales by product line bar chart"""
+    sales = [record["SALES"] for record in records]
+    fig = go.Figure(go.Bar(
+        x=[record["PRODUCTLINE"] for record in records],
+        y=sales,
+        marker=dict(color=sales, colorscale="Blues", showscale=True, colorbar=dict(title="SALES")),
+        hoverinfo="skip"
+    ))
+    fig.update_layout(
+        title="Sales by Product Line",
+        xaxis_title="Product Line",
+        yaxis_title="Sales ($)",
+        xaxis_tickangle=-45,
+        uirevision="sales_by_category"
+    )
+    return fig
 
-# Main dashboard content
-tab1, tab2, tab3, tab4, tab5 = st.tabs(["📈 Overview", "🏷️ Products", "🌍 Geography", "👥 Customers", "📊 Analytics"])
+@st.cache_resource(show_spinner=False, max_entries=32)
+def build_country_fig(records):
+    """Build the sales by country bar chart"""
+    fig = go.Figure(go.Bar(
+        x=[record["COUNTRY"] for record in records],
+        y=[record["SALES"] for record in records],
+        marker_color="#2ca02c",
+        hoverinfo="skip"
+    ))
+    fig.update_layout(
+        title="Top Countries by Sales",
+        xaxis_title="Country",
+        yaxis_title="Sales ($)",
+        xaxis_tickangle=-45,
+        uirevision="sales_by_country"
+    )
+    return fig
 
-with tab1:
+@st.cache_resource(show_spinner=False, max_entries=32)
+def build_customers_fig(df_customers):
+    """Build the top customers bar chart"""
+    fig = go.Figure(go.Bar(
+        x=df_customers["customer"].to_numpy(),
+        y=df_customers["total_sales"].to_numpy(),
+        marker_color="#9467bd",
+        hoverinfo="skip"
+    ))
+    fig.update_layout(
+        title="Top Customers by Sales",
+        xaxis_title="Customer",
+        yaxis_title="Total Sales ($)",
+        xaxis_tickangle=-45,
+        uirevision="top_customers"
+    )
+    return fig
+
+# Tab contents are fragments: an interaction inside one tab reruns only that tab.
+# JSON data comes from the bundle; only the Arrow-served tables are fetched in their tab.
+# Those two GETs run one after the other, but both are served from the disk cache on most
+# runs, so fanning them out concurrently would rarely save a round trip.
+
+@st.fragment
+def render_overview_tab(kpis, order_status, period, year):
+    """Render the overview tab: KPIs, sales trend and order status"""
     st.header("📈 Sales Overview")
     
-    # Fetch KPIs
-    kpis = fetch_data("/kpis")
+    # KPIs
     if kpis:
         col1, col2, col3, col4 = st.columns(4)
         
@@ -124,54 +352,31 @@ with tab1:
     
     # Sales over time chart
     st.subheader("📈 Sales Trend Over Time")
-    sales_over_time = fetch_data("/sales_over_time", {"period": period, "year": selected_year})
-    
-    if sales_over_time:
-        df_time = pd.DataFrame(sales_over_time["data"])
-        df_time.columns = ["Date", "Sales"]
-        
-        fig = px.line(
-            df_time, 
-            x="Date", 
-            y="Sales",
-            title=f"Sales Trend by {period.title()}",
-            markers=True
-        )
-        fig.update_layout(
-            xaxis_title="Date",
-            yaxis_title="Sales ($)",
-            hovermode='x unified'
-        )
-        st.plotly_chart(fig, use_container_width=True)
+    # Daily data is the largest payload, so it comes as Arrow rather than in the JSON bundle
+    df_time = fetch_table("/sales_over_time", {"period": period, "year": year})
+    if df_time is not None and not df_time.empty:
+        st.plotly_chart(build_trend_fig(df_time, period), use_container_width=True, config=PLOTLY_CONFIG)
     
     # Order status distribution
     st.subheader("📋 Order Status Distribution")
-    order_status = fetch_data("/order_status")
-    
     if order_status:
         df_status = pd.DataFrame(order_status["data"])
         
         col1, col2 = st.columns([2, 1])
         
         with col1:
-            fig = px.pie(
-                df_status, 
-                values="count", 
-                names="status",
-                title="Order Status Distribution",
-                color_discrete_sequence=px.colors.qualitative.Set3
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(build_status_pie(order_status["data"]), use_container_width=True, config=PLOTLY_CONFIG)
         
         with col2:
             st.dataframe(df_status, use_container_width=True)
 
-with tab2:
+@st.fragment
+def render_products_tab(category_sales):
+    """Render the product analysis tab"""
     st.header("🏷️ Product Analysis")
     
     # Sales by product category
     st.subheader("📊 Sales by Product Line")
-    category_sales = fetch_data("/sales_by_category")
     
     if category_sales:
         df_category = pd.DataFrame(category_sales["data"])
@@ -179,30 +384,18 @@ with tab2:
         col1, col2 = st.columns([2, 1])
         
         with col1:
-            fig = px.bar(
-                df_category,
-                x="PRODUCTLINE",
-                y="SALES",
-                title="Sales by Product Line",
-                color="SALES",
-                color_continuous_scale="Blues"
-            )
-            fig.update_layout(
-                xaxis_title="Product Line",
-                yaxis_title="Sales ($)",
-                xaxis_tickangle=-45
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(build_category_fig(category_sales["data"]), use_container_width=True, config=PLOTLY_CONFIG)
         
         with col2:
-            st.dataframe(df_category, use_container_width=True)
+            st.dataframe(df_category.style.format({"SALES": CURRENCY_FORMAT}), use_container_width=True)
 
-with tab3:
+@st.fragment
+def render_geography_tab(country_sales):
+    """Render the geographic analysis tab"""
     st.header("🌍 Geographic Analysis")
     
     # Sales by country
     st.subheader("🗺️ Sales by Country")
-    country_sales = fetch_data("/sales_by_country", {"limit": 15})
     
     if country_sales:
         df_country = pd.DataFrame(country_sales["data"])
@@ -210,62 +403,39 @@ with tab3:
         col1, col2 = st.columns([2, 1])
         
         with col1:
-            fig = px.bar(
-                df_country,
-                x="COUNTRY",
-                y="SALES",
-                title="Top Countries by Sales",
-                color="SALES",
-                color_continuous_scale="Greens"
-            )
-            fig.update_layout(
-                xaxis_title="Country",
-                yaxis_title="Sales ($)",
-                xaxis_tickangle=-45
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(build_country_fig(country_sales["data"]), use_container_width=True, config=PLOTLY_CONFIG)
         
         with col2:
-            st.dataframe(df_country, use_container_width=True)
+            st.dataframe(df_country.style.format({"SALES": CURRENCY_FORMAT}), use_container_width=True)
 
-with tab4:
+@st.fragment
+def render_customers_tab():
+    """Render the customer analysis tab"""
     st.header("👥 Customer Analysis")
     
     # Top customers
     st.subheader("🏆 Top Customers")
-    top_customers = fetch_data("/top_customers", {"limit": 15})
+    df_customers = fetch_table("/top_customers", {"limit": 15})
     
-    if top_customers:
-        df_customers = pd.DataFrame(top_customers["data"])
-        
+    if df_customers is not None:
         col1, col2 = st.columns([2, 1])
         
         with col1:
-            fig = px.bar(
-                df_customers,
-                x="customer",
-                y="total_sales",
-                title="Top Customers by Sales",
-                color="total_sales",
-                color_continuous_scale="Purples"
-            )
-            fig.update_layout(
-                xaxis_title="Customer",
-                yaxis_title="Total Sales ($)",
-                xaxis_tickangle=-45
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(build_customers_fig(df_customers), use_container_width=True, config=PLOTLY_CONFIG)
         
         with col2:
-            st.dataframe(df_customers, use_container_width=True)
+            st.dataframe(
+                df_customers.style.format({"total_sales": CURRENCY_FORMAT, "total_quantity": "{:,}"}),
+                use_container_width=True
+            )
 
-with tab5:
+@st.fragment
+def render_analytics_tab(kpis, data_summary):
+    """Render the advanced analytics tab"""
     st.header("📊 Advanced Analytics")
     
     # Data summary
     st.subheader("📋 Data Summary")
-    data_summary = fetch_data("/data_summary")
-    
     if data_summary:
         col1, col2, col3, col4 = st.columns(4)
         
@@ -288,20 +458,80 @@ with tab5:
     
     # Calculate some additional metrics
     if kpis and data_summary:
+        orders_per_customer, sales_per_customer, quantity_per_order = compute_perf(
+            kpis["total_orders"], kpis["total_sales"], kpis["total_quantity"], data_summary["unique_customers"]
+        )
+        
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            orders_per_customer = kpis["total_orders"] / data_summary["unique_customers"]
             st.metric("Orders per Customer", f"{orders_per_customer:.1f}")
         
         with col2:
-            sales_per_customer = kpis["total_sales"] / data_summary["unique_customers"]
             st.metric("Sales per Customer", format_currency(sales_per_customer))
         
         with col3:
-            quantity_per_order = kpis["total_quantity"] / kpis["total_orders"]
             st.metric("Quantity per Order", f"{quantity_per_order:.1f}")
 
+@st.fragment(run_every=AUTO_REFRESH_SECONDS)
+def schedule_refresh():
+    """Rerun the whole app on a timer without holding the script thread in between"""
+    # Called once inside every full run (which starts the timer); each later call
+    # comes from the timer alone and triggers the full rerun
+    if not st.session_state.get("in_full_run"):
+        st.rerun()
+
+# Main header
+st.markdown('<h1 class="main-header">📊 Sales Data Dashboard</h1>', unsafe_allow_html=True)
+
+# Sidebar for filters
+st.sidebar.header("🔧 Filters & Controls")
+
+# Check API connection
+with st.spinner("Checking API connection..."):
+    api_status = check_api()
+    if api_status:
+        st.sidebar.success("✅ API Connected")
+    else:
+        st.sidebar.error("❌ API Connection Failed")
+        st.error("Please make sure the backend API is running on http://localhost:8000")
+        st.stop()
+
+# Sidebar filters
+st.sidebar.subheader("📅 Time Filters")
+period = st.sidebar.selectbox("Time Period", PERIOD_OPTIONS, index=0)
+year_filter = st.sidebar.selectbox("Year Filter", YEAR_OPTIONS, index=0)
+
+# Convert year filter
+selected_year = None if year_filter == "All" else year_filter
+
+# Fetch all JSON data up front in a single bundled request
+results = fetch_bundle({
+    "kpis": ("/kpis", None),
+    "order_status": ("/order_status", None),
+    "sales_by_category": ("/sales_by_category", None),
+    "sales_by_country": ("/sales_by_country", {"limit": 15}),
+    "data_summary": ("/data_summary", None)
+})
+
+# Main dashboard content
+tab1, tab2, tab3, tab4, tab5 = st.tabs(TAB_LABELS)
+
+with tab1:
+    render_overview_tab(results["kpis"], results["order_status"], period, selected_year)
+
+with tab2:
+    render_products_tab(results["sales_by_category"])
+
+with tab3:
+    render_geography_tab(results["sales_by_country"])
+
+with tab4:
+    render_customers_tab()
+
+with tab5:
+    render_analytics_tab(results["kpis"], results["data_summary"])
+
 # Footer
 st.markdown("---")
 st.markdown(
@@ -314,6 +544,7 @@ st.markdown(
 )
 
 # Auto-refresh option
-if st.sidebar.checkbox("🔄 Auto-refresh (30s)"):
-    time.sleep(30)
-    st.rerun()
+if st.sidebar.checkbox(f"🔄 Auto-refresh ({AUTO_REFRESH_SECONDS}s)", key="auto_refresh"):
+    st.session_state["in_full_run"] = True
+    schedule_refresh()
+    st.session_state["in_full_run"] = False